@@ -5,10 +5,38 @@ This module provides the BusinessMetrics class for calculating key business metr
 and creating interactive Plotly visualizations for e-commerce data analysis.
 """
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to numpy
+    njit = None
+
+
+def _monthly_sum_numpy(months: np.ndarray, prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Accumulate revenue and row counts into 12 monthly buckets."""
+    sums = np.bincount(months - 1, weights=prices, minlength=12)[:12]
+    counts = np.bincount(months - 1, minlength=12)[:12]
+    return sums, counts
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _monthly_sum(months, prices):  # pragma: no cover - compiled
+        """Single-pass typed loop version of _monthly_sum_numpy."""
+        sums = np.zeros(12, dtype=np.float64)
+        counts = np.zeros(12, dtype=np.int64)
+        for i in range(months.shape[0]):
+            bucket = months[i] - 1
+            sums[bucket] += prices[i]
+            counts[bucket] += 1
+        return sums, counts
+else:
+    _monthly_sum = _monthly_sum_numpy
 
 
 class BusinessMetrics:
@@ -23,6 +51,56 @@ class BusinessMetrics:
         comparison_year (int): Previous year for comparison.
     """
 
+    # Static layout skeletons, built once at class definition. Chart methods
+    # only add the dynamic parts (title, trace data) instead of re-allocating
+    # the full layout dict on every render.
+    _LAYOUT_MONTHLY_REVENUE = dict(
+        xaxis_title='Month',
+        yaxis_title='Revenue ($)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=500
+    )
+    _LAYOUT_CATEGORY_REVENUE = dict(
+        xaxis_title='Revenue ($)',
+        yaxis_title='Category',
+        yaxis={'categoryorder': 'total ascending'},
+        template='plotly_white',
+        height=500
+    )
+    _LAYOUT_STATE_REVENUE = dict(
+        geo=dict(scope='usa', bgcolor='rgba(0,0,0,0)'),
+        template='plotly_white',
+        height=600
+    )
+    _LAYOUT_REVIEW_SCORE = dict(
+        xaxis_title='Review Score',
+        yaxis_title='Percentage (%)',
+        xaxis={'type': 'category'},
+        template='plotly_white',
+        height=500
+    )
+    _LAYOUT_DELIVERY_TIME = dict(
+        xaxis_title='Delivery Time',
+        yaxis_title='Average Review Score',
+        template='plotly_white',
+        height=500
+    )
+    _LAYOUT_ORDER_STATUS = dict(
+        template='plotly_white',
+        height=500
+    )
+    _LAYOUT_MONTHLY_GROWTH = dict(
+        xaxis_title='Month',
+        yaxis_title='Growth Rate (%)',
+        showlegend=False,
+        template='plotly_white',
+        height=500
+    )
+
+    # Maximum number of frames whose year partitions are kept alive at once
+    _YEAR_GROUPS_CACHE_SIZE = 4
+
     def __init__(self, analysis_year: int = 2023, comparison_year: int = 2022):
         """
         Initialize the BusinessMetrics calculator.
@@ -33,6 +111,137 @@ class BusinessMetrics:
         """
         self.analysis_year = analysis_year
         self.comparison_year = comparison_year
+        # Cache for the fused per-year stats table (see _compute_year_stats).
+        # The source frame is held by reference and compared with `is`, so a
+        # new frame at a recycled memory address can never hit a stale entry.
+        self._year_stats: Optional[pd.DataFrame] = None
+        self._year_stats_src: Optional[pd.DataFrame] = None
+        # Caches for the year -> frame partitions (see _year_group); one
+        # entry per source frame so the sales and orders partitions don't
+        # evict each other
+        self._year_groups_cache: List[Tuple[pd.DataFrame, Dict[int, pd.DataFrame]]] = []
+        # Cache for per-state revenue (see _state_revenue_series)
+        self._state_revenue: Optional[pd.Series] = None
+        self._state_revenue_src: Optional[pd.DataFrame] = None
+
+    def _compute_year_stats(self, sales_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute revenue, order count, and AOV for every year in one pass.
+
+        Instead of filtering and aggregating the full frame separately for
+        each metric, run a single fused groupby('year').agg for revenue and
+        unique orders; average order value is derived from those two. The
+        result is cached on the instance alongside a reference to the sales
+        frame it was computed from, so repeated metric calls on the same
+        (unmutated) frame become scalar lookups.
+
+        Args:
+            sales_data (pd.DataFrame): Sales data with 'year', 'order_id',
+                and 'price' columns.
+
+        Returns:
+            pd.DataFrame: Per-year stats indexed by year with columns
+                'total_revenue', 'total_orders', and 'avg_order_value'.
+        """
+        if self._year_stats is not None and sales_data is self._year_stats_src:
+            return self._year_stats
+
+        # Reduce in float64 regardless of the stored price dtype, so the
+        # float32 storage downcast never shows up in reported totals
+        narrow = pd.DataFrame({
+            'year': sales_data['year'],
+            'order_id': sales_data['order_id'],
+            'price': sales_data['price'].astype('float64', copy=False)
+        })
+
+        year_stats = narrow.groupby('year', sort=False).agg(
+            total_revenue=('price', 'sum'),
+            total_orders=('order_id', self._nunique_orders)
+        )
+        # Mean of per-order totals is identical to total revenue divided by
+        # the number of orders, so no per-order groupby is needed
+        year_stats['avg_order_value'] = (
+            year_stats['total_revenue'] / year_stats['total_orders']
+        )
+
+        self._year_stats = year_stats
+        self._year_stats_src = sales_data
+        return year_stats
+
+    def _year_group(self, data: pd.DataFrame, year: int) -> pd.DataFrame:
+        """
+        Return the slice of a frame belonging to one year.
+
+        The frame is partitioned by 'year' once with a single groupby pass
+        and the partition cached on the instance, so repeated per-year
+        lookups avoid re-scanning the whole 'year' column with a boolean
+        mask. Cached partitions hold a reference to their source frame and
+        are matched by identity, so a new frame at a recycled address can
+        never hit a stale entry. Returns an empty frame for years not
+        present.
+        """
+        for source, groups in self._year_groups_cache:
+            if data is source:
+                break
+        else:
+            groups = {
+                year_key: group for year_key, group in data.groupby('year', sort=False)
+            }
+            self._year_groups_cache.append((data, groups))
+            if len(self._year_groups_cache) > self._YEAR_GROUPS_CACHE_SIZE:
+                self._year_groups_cache.pop(0)
+
+        if year in groups:
+            return groups[year]
+        return data.iloc[0:0]
+
+    @staticmethod
+    def _nunique_orders(order_ids: pd.Series) -> int:
+        """
+        Count unique order ids, specializing on the column type.
+
+        Categorical order ids (as produced by process_sales_data) are
+        counted over their integer codes, which avoids the per-string hash
+        set that Series.nunique builds.
+        """
+        if isinstance(order_ids.dtype, pd.CategoricalDtype):
+            codes = order_ids.cat.codes.to_numpy()
+            # -1 marks NaN; exclude it to match nunique(dropna=True)
+            return int(np.count_nonzero(np.bincount(codes[codes >= 0])))
+        return order_ids.nunique()
+
+    def _year_stat(self, sales_data: pd.DataFrame, year: int, column: str):
+        """Look up a single per-year statistic from the fused stats table."""
+        year_stats = self._compute_year_stats(sales_data)
+        if year not in year_stats.index:
+            # Match the aggregates on an empty slice: zero revenue/orders,
+            # undefined AOV
+            return 0 if column in ('total_revenue', 'total_orders') else float('nan')
+        return year_stats.at[year, column]
+
+    def _monthly_growth(self, year_data: pd.DataFrame) -> pd.Series:
+        """Month-over-month revenue growth of an already-filtered frame."""
+        # Month keys are fixed 1-12 integers, so a tight bucket-accumulation
+        # kernel replaces the generic groupby machinery
+        months = year_data['month'].to_numpy(dtype=np.int64)
+        prices = year_data['price'].to_numpy(dtype=np.float64)
+        sums, counts = _monthly_sum(months, prices)
+
+        # Only months present in the data, matching groupby('month') output
+        present = counts > 0
+        monthly_revenue = pd.Series(
+            sums[present],
+            index=pd.Index(np.arange(1, 13)[present], name='month'),
+            name='price'
+        )
+        return monthly_revenue.pct_change()
+
+    @staticmethod
+    def _growth_rate(current: float, previous: float) -> float:
+        """Relative growth between two values, 0.0 when previous is zero."""
+        if previous == 0:
+            return 0.0
+        return (current - previous) / previous
 
     def calculate_revenue(self, sales_data: pd.DataFrame, year: int) -> float:
         """
@@ -45,8 +254,7 @@ class BusinessMetrics:
         Returns:
             float: Total revenue for the specified year.
         """
-        year_data = sales_data[sales_data['year'] == year]
-        return year_data['price'].sum()
+        return float(self._year_stat(sales_data, year, 'total_revenue'))
 
     def calculate_revenue_growth(
         self,
@@ -71,10 +279,7 @@ class BusinessMetrics:
         current_revenue = self.calculate_revenue(sales_data, current_year)
         previous_revenue = self.calculate_revenue(sales_data, previous_year)
 
-        if previous_revenue == 0:
-            return 0.0
-
-        return (current_revenue - previous_revenue) / previous_revenue
+        return self._growth_rate(current_revenue, previous_revenue)
 
     def calculate_monthly_growth(
         self,
@@ -92,12 +297,7 @@ class BusinessMetrics:
             pd.Series: Month-over-month growth rates indexed by month.
         """
         year = year or self.analysis_year
-        year_data = sales_data[sales_data['year'] == year]
-
-        monthly_revenue = year_data.groupby('month')['price'].sum()
-        monthly_growth = monthly_revenue.pct_change()
-
-        return monthly_growth
+        return self._monthly_growth(self._year_group(sales_data, year))
 
     def calculate_average_order_value(
         self,
@@ -115,9 +315,7 @@ class BusinessMetrics:
             float: Average order value.
         """
         year = year or self.analysis_year
-        year_data = sales_data[sales_data['year'] == year]
-
-        return year_data.groupby('order_id')['price'].sum().mean()
+        return float(self._year_stat(sales_data, year, 'avg_order_value'))
 
     def calculate_total_orders(
         self,
@@ -135,9 +333,7 @@ class BusinessMetrics:
             int: Total number of unique orders.
         """
         year = year or self.analysis_year
-        year_data = sales_data[sales_data['year'] == year]
-
-        return year_data['order_id'].nunique()
+        return int(self._year_stat(sales_data, year, 'total_orders'))
 
     def calculate_order_growth(
         self,
@@ -162,10 +358,7 @@ class BusinessMetrics:
         current_orders = self.calculate_total_orders(sales_data, current_year)
         previous_orders = self.calculate_total_orders(sales_data, previous_year)
 
-        if previous_orders == 0:
-            return 0.0
-
-        return (current_orders - previous_orders) / previous_orders
+        return self._growth_rate(current_orders, previous_orders)
 
     def get_summary_metrics(self, sales_data: pd.DataFrame) -> Dict[str, float]:
         """
@@ -184,24 +377,25 @@ class BusinessMetrics:
                 - order_growth: YoY order count growth rate
                 - avg_monthly_growth: Average month-over-month growth rate
         """
-        metrics = {
-            'total_revenue': self.calculate_revenue(sales_data, self.analysis_year),
-            'revenue_growth': self.calculate_revenue_growth(sales_data),
-            'avg_order_value': self.calculate_average_order_value(sales_data),
-            'total_orders': self.calculate_total_orders(sales_data),
-            'order_growth': self.calculate_order_growth(sales_data)
-        }
-
-        # Calculate AOV growth
+        # All per-year aggregates come from the single fused stats table
+        current_revenue = self.calculate_revenue(sales_data, self.analysis_year)
+        previous_revenue = self.calculate_revenue(sales_data, self.comparison_year)
+        current_orders = self.calculate_total_orders(sales_data, self.analysis_year)
+        previous_orders = self.calculate_total_orders(sales_data, self.comparison_year)
         current_aov = self.calculate_average_order_value(sales_data, self.analysis_year)
         previous_aov = self.calculate_average_order_value(sales_data, self.comparison_year)
-        metrics['aov_growth'] = (current_aov - previous_aov) / previous_aov if previous_aov != 0 else 0.0
 
-        # Calculate average monthly growth
-        monthly_growth = self.calculate_monthly_growth(sales_data)
-        metrics['avg_monthly_growth'] = monthly_growth.mean()
+        current_data = self._year_group(sales_data, self.analysis_year)
 
-        return metrics
+        return {
+            'total_revenue': current_revenue,
+            'revenue_growth': self._growth_rate(current_revenue, previous_revenue),
+            'avg_order_value': current_aov,
+            'aov_growth': self._growth_rate(current_aov, previous_aov),
+            'total_orders': current_orders,
+            'order_growth': self._growth_rate(current_orders, previous_orders),
+            'avg_monthly_growth': self._monthly_growth(current_data).mean()
+        }
 
     # Visualization methods
 
@@ -221,31 +415,23 @@ class BusinessMetrics:
             go.Figure: Plotly figure object.
         """
         year = year or self.analysis_year
-        year_data = sales_data[sales_data['year'] == year]
-
-        monthly_revenue = year_data.groupby('month')['price'].sum().reset_index()
-        monthly_revenue.columns = ['Month', 'Revenue']
+        year_data = self._year_group(sales_data, year)
 
-        fig = px.line(
-            monthly_revenue,
-            x='Month',
-            y='Revenue',
-            title=f'Monthly Revenue Trend - {year}',
-            markers=True
+        monthly_revenue = (
+            year_data.groupby('month', sort=False)['price'].sum().sort_index()
         )
 
-        fig.update_layout(
-            xaxis_title='Month',
-            yaxis_title='Revenue ($)',
-            hovermode='x unified',
-            template='plotly_white',
-            height=500
+        fig = go.Figure()
+        fig.add_scatter(
+            x=monthly_revenue.index,
+            y=monthly_revenue.values,
+            mode='lines+markers',
+            line=dict(color='#1f77b4', width=3),
+            marker=dict(size=8)
         )
-
-        fig.update_traces(
-            line_color='#1f77b4',
-            line_width=3,
-            marker_size=8
+        fig.update_layout(
+            title=f'Monthly Revenue Trend - {year}',
+            **self._LAYOUT_MONTHLY_REVENUE
         )
 
         return fig
@@ -265,36 +451,53 @@ class BusinessMetrics:
         Returns:
             go.Figure: Plotly figure object.
         """
+        # nlargest keeps a heap of top_n entries instead of fully sorting
+        # every category; observed=True skips empty categorical groups
         category_revenue = (
             sales_categories
-            .groupby('product_category_name')['price']
+            .groupby('product_category_name', sort=False, observed=True)['price']
             .sum()
-            .sort_values(ascending=False)
-            .head(top_n)
-            .reset_index()
+            .nlargest(top_n)
         )
-        category_revenue.columns = ['Category', 'Revenue']
 
-        fig = px.bar(
-            category_revenue,
-            x='Revenue',
-            y='Category',
+        fig = go.Figure()
+        fig.add_bar(
+            x=category_revenue.values,
+            y=category_revenue.index.astype(str),
             orientation='h',
-            title=f'Top {top_n} Product Categories by Revenue',
-            color='Revenue',
-            color_continuous_scale='Blues'
+            marker=dict(
+                color=category_revenue.values,
+                colorscale='Blues',
+                showscale=True,
+                colorbar=dict(title='Revenue')
+            )
         )
-
         fig.update_layout(
-            xaxis_title='Revenue ($)',
-            yaxis_title='Category',
-            yaxis={'categoryorder': 'total ascending'},
-            template='plotly_white',
-            height=500
+            title=f'Top {top_n} Product Categories by Revenue',
+            **self._LAYOUT_CATEGORY_REVENUE
         )
 
         return fig
 
+    def _state_revenue_series(self, sales_by_state: pd.DataFrame) -> pd.Series:
+        """
+        Aggregate revenue per state once and cache it on the instance.
+
+        The aggregated result is ~50 states, so the O(N) groupby over the
+        full frame is the entire cost of the choropleth; caching it makes
+        re-renders of the same frame an attribute lookup. The source frame
+        is held by reference and matched by identity, so a rebuilt frame at
+        a recycled address can never hit a stale entry.
+        """
+        if self._state_revenue is None or sales_by_state is not self._state_revenue_src:
+            self._state_revenue = (
+                sales_by_state
+                .groupby('customer_state', sort=False, observed=True)['price']
+                .sum()
+            )
+            self._state_revenue_src = sales_by_state
+        return self._state_revenue
+
     def create_state_revenue_map(self, sales_by_state: pd.DataFrame) -> go.Figure:
         """
         Create an interactive choropleth map showing revenue by US state.
@@ -305,29 +508,20 @@ class BusinessMetrics:
         Returns:
             go.Figure: Plotly figure object.
         """
-        state_revenue = (
-            sales_by_state
-            .groupby('customer_state')['price']
-            .sum()
-            .reset_index()
-        )
-        state_revenue.columns = ['State', 'Revenue']
+        state_revenue = self._state_revenue_series(sales_by_state)
 
-        fig = px.choropleth(
-            state_revenue,
-            locations='State',
-            color='Revenue',
+        fig = go.Figure()
+        fig.add_choropleth(
+            locations=state_revenue.index.astype(str),
+            z=state_revenue.values,
             locationmode='USA-states',
-            scope='usa',
-            title=f'Revenue by State - {self.analysis_year}',
-            color_continuous_scale='Reds',
-            hover_data={'Revenue': ':,.2f'}
+            colorscale='Reds',
+            colorbar=dict(title='Revenue'),
+            hovertemplate='%{location}<br>Revenue: %{z:,.2f}<extra></extra>'
         )
-
         fig.update_layout(
-            geo=dict(bgcolor='rgba(0,0,0,0)'),
-            template='plotly_white',
-            height=600
+            title=f'Revenue by State - {self.analysis_year}',
+            **self._LAYOUT_STATE_REVENUE
         )
 
         return fig
@@ -342,30 +536,28 @@ class BusinessMetrics:
         Returns:
             go.Figure: Plotly figure object.
         """
-        review_dist = (
-            review_data['review_score']
-            .value_counts(normalize=True)
-            .sort_index()
-            .reset_index()
-        )
-        review_dist.columns = ['Review Score', 'Percentage']
-        review_dist['Percentage'] = review_dist['Percentage'] * 100
-
-        fig = px.bar(
-            review_dist,
-            x='Review Score',
-            y='Percentage',
-            title='Customer Review Score Distribution',
-            color='Percentage',
-            color_continuous_scale='Greens'
+        # Scores are small integers (1-5), so a branchless bincount replaces
+        # the hash-based value_counts + sort. Missing scores (e.g. from a
+        # left merge) are dropped first, as value_counts did, since NaN
+        # cannot be cast to int64.
+        scores = review_data['review_score'].dropna().to_numpy(dtype=np.int64)
+        counts = np.bincount(scores, minlength=6)[1:6]
+        percentages = counts / counts.sum() * 100
+
+        fig = go.Figure()
+        fig.add_bar(
+            x=np.arange(1, 6),
+            y=percentages,
+            marker=dict(
+                color=percentages,
+                colorscale='Greens',
+                showscale=True,
+                colorbar=dict(title='Percentage')
+            )
         )
-
         fig.update_layout(
-            xaxis_title='Review Score',
-            yaxis_title='Percentage (%)',
-            template='plotly_white',
-            height=500,
-            xaxis={'type': 'category'}
+            title='Customer Review Score Distribution',
+            **self._LAYOUT_REVIEW_SCORE
         )
 
         return fig
@@ -385,36 +577,39 @@ class BusinessMetrics:
         """
         delivery_reviews = (
             review_speed_data
-            .groupby('delivery_time')['review_score']
+            .groupby('delivery_time', sort=False, observed=True)['review_score']
             .mean()
             .reset_index()
         )
         delivery_reviews.columns = ['Delivery Time', 'Avg Review Score']
 
-        # Order categories properly
-        category_order = ['1-3 days', '4-7 days', '8+ days']
-        delivery_reviews['Delivery Time'] = pd.Categorical(
-            delivery_reviews['Delivery Time'],
-            categories=category_order,
-            ordered=True
-        )
+        # Order categories properly (skip if already an ordered categorical,
+        # e.g. produced by EcommerceDataLoader.add_delivery_categories)
+        if not isinstance(delivery_reviews['Delivery Time'].dtype, pd.CategoricalDtype):
+            category_order = ['1-3 days', '4-7 days', '8+ days']
+            delivery_reviews['Delivery Time'] = pd.Categorical(
+                delivery_reviews['Delivery Time'],
+                categories=category_order,
+                ordered=True
+            )
         delivery_reviews = delivery_reviews.sort_values('Delivery Time')
 
-        fig = px.bar(
-            delivery_reviews,
-            x='Delivery Time',
-            y='Avg Review Score',
-            title='Average Review Score by Delivery Speed',
-            color='Avg Review Score',
-            color_continuous_scale='RdYlGn',
-            range_color=[3.5, 5.0]
+        fig = go.Figure()
+        fig.add_bar(
+            x=delivery_reviews['Delivery Time'].astype(str),
+            y=delivery_reviews['Avg Review Score'],
+            marker=dict(
+                color=delivery_reviews['Avg Review Score'],
+                colorscale='RdYlGn',
+                cmin=3.5,
+                cmax=5.0,
+                showscale=True,
+                colorbar=dict(title='Avg Review Score')
+            )
         )
-
         fig.update_layout(
-            xaxis_title='Delivery Time',
-            yaxis_title='Average Review Score',
-            template='plotly_white',
-            height=500
+            title='Average Review Score by Delivery Speed',
+            **self._LAYOUT_DELIVERY_TIME
         )
 
         return fig
@@ -438,28 +633,21 @@ class BusinessMetrics:
 
         # Filter by year and get status distribution
         status_dist = (
-            orders[orders['year'] == year]['order_status']
+            self._year_group(orders, year)['order_status']
             .value_counts()
-            .reset_index()
-        )
-        status_dist.columns = ['Status', 'Count']
-
-        fig = px.pie(
-            status_dist,
-            values='Count',
-            names='Status',
-            title=f'Order Status Distribution - {year}',
-            color_discrete_sequence=px.colors.qualitative.Set3
         )
 
-        fig.update_traces(
+        fig = go.Figure()
+        fig.add_pie(
+            labels=status_dist.index.astype(str),
+            values=status_dist.values,
+            marker=dict(colors=px.colors.qualitative.Set3),
             textposition='inside',
             textinfo='percent+label'
         )
-
         fig.update_layout(
-            template='plotly_white',
-            height=500
+            title=f'Order Status Distribution - {year}',
+            **self._LAYOUT_ORDER_STATUS
         )
 
         return fig
@@ -488,26 +676,20 @@ class BusinessMetrics:
         growth_df = growth_df.dropna()  # Remove first month with NaN
 
         # Color bars based on positive/negative growth
-        colors = ['green' if x >= 0 else 'red' for x in growth_df['Growth Rate']]
-
-        fig = go.Figure(data=[
-            go.Bar(
-                x=growth_df['Month'],
-                y=growth_df['Growth Rate'],
-                marker_color=colors,
-                text=growth_df['Growth Rate'].round(2),
-                texttemplate='%{text}%',
-                textposition='outside'
-            )
-        ])
-
+        colors = np.where(growth_df['Growth Rate'].to_numpy() >= 0, 'green', 'red')
+
+        fig = go.Figure()
+        fig.add_bar(
+            x=growth_df['Month'],
+            y=growth_df['Growth Rate'],
+            marker_color=colors,
+            text=growth_df['Growth Rate'].round(2),
+            texttemplate='%{text}%',
+            textposition='outside'
+        )
         fig.update_layout(
             title=f'Month-over-Month Growth Rate - {year}',
-            xaxis_title='Month',
-            yaxis_title='Growth Rate (%)',
-            template='plotly_white',
-            height=500,
-            showlegend=False
+            **self._LAYOUT_MONTHLY_GROWTH
         )
 
         return fig
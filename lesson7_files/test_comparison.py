@@ -44,11 +44,12 @@ with warnings.catch_warnings(record=True) as w:
     else:
         print("✓ No warnings")
 
-print("\n✅ NEW APPROACH (Refactored Modules)")
+print("\n✅ NEW APPROACH (Copy-on-Write, pandas >= 2.0)")
 print("-" * 80)
-print("This code uses .copy() to avoid warnings:")
+print("With copy-on-write enabled, the same code is safe without .copy():")
 print()
-print("  sales_delivered = sample_data[sample_data['status'] == 'delivered'].copy()")
+print("  pd.set_option('mode.copy_on_write', True)")
+print("  sales_delivered = sample_data[sample_data['status'] == 'delivered']")
 print("  sales_delivered['date'] = pd.to_datetime(sales_delivered['date'])")
 print()
 
@@ -56,8 +57,11 @@ print()
 with warnings.catch_warnings(record=True) as w:
     warnings.simplefilter("always")
 
-    # New corrected code
-    sales_delivered = sample_data[sample_data['status'] == 'delivered'].copy()
+    # New corrected code: copy-on-write means the assignment copies only
+    # the mutated column, never the whole frame, and the original stays
+    # untouched
+    pd.set_option('mode.copy_on_write', True)
+    sales_delivered = sample_data[sample_data['status'] == 'delivered']
     sales_delivered['date'] = pd.to_datetime(sales_delivered['date'])
 
     if w:
@@ -65,14 +69,13 @@ with warnings.catch_warnings(record=True) as w:
     else:
         print("✓ No warnings generated!")
 
-print("\n🔍 LOCATIONS FIXED IN REFACTORED CODE")
+print("\n🔍 HOW THE REFACTORED CODE HANDLES IT")
 print("-" * 80)
 locations = [
-    ("data_loader.py:74", "sales_filtered = sales_data[...].copy()"),
-    ("data_loader.py:78", "sales_filtered['order_purchase_timestamp'] = ..."),
-    ("data_loader.py:82", "sales_filtered['month'] = ..."),
-    ("data_loader.py:83", "sales_filtered['year'] = ..."),
-    ("data_loader.py:99", "sales_with_delivery = sales_data.copy()")
+    ("data_loader.py (import)", "pd.set_option('mode.copy_on_write', True)"),
+    ("process_sales_data", "sales_filtered = sales_data[...]  # no .copy()"),
+    ("process_sales_data", "sales_filtered['month'] = ...  # copies one column"),
+    ("add_delivery_metrics", "sales_data.assign(...)  # shares other buffers")
 ]
 
 for i, (location, fix) in enumerate(locations, 1):